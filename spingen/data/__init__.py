@@ -1 +1,3 @@
 from .spinsystem import *
+from .library import *
+from .qm import *
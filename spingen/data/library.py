@@ -0,0 +1,344 @@
+from multiprocessing import shared_memory
+from math import prod
+from typing import Iterable, Iterator
+import numpy as np
+import sys
+
+from .spinsystem import System, Hz, ppm
+
+type Layout = dict[str, tuple[str, tuple[int, ...], int]]
+
+# Order in which the library arrays are packed into a shared memory block
+LIBRARY_FIELDS = ('offsets', 'coupling_offsets', 'names', 'shifts', 'couplings', 'centers',
+                  'sources', 'lw_offsets', 'line_widths')
+
+def _align(nbytes : int, alignment : int = 8) -> int:
+    """Round a byte count up to the next multiple of alignment"""
+    return -(-nbytes // alignment) * alignment
+
+class SystemView(object):
+    __slots__ = ('_library', '_index')
+
+    def __init__(self, library : "SystemLibrary", index : int) -> None:
+        """Lightweight system object whose attributes are views into a SystemLibrary
+
+        Exposes the same attributes as System, so it can be passed anywhere a System is expected.
+        No data is stored on the view itself, every attribute is a slice of the library arrays.
+
+        Parameters
+        ----------
+        library : SystemLibrary
+            library holding the contiguous arrays
+        index : int
+            index of the system within the library
+        """
+        self._library = library
+        self._index = index
+
+    @property
+    def N(self) -> int:
+        """Number of spins in the system"""
+        offsets = self._library.offsets
+        return int(offsets[self._index + 1] - offsets[self._index])
+
+    @property
+    def names(self) -> np.ndarray:
+        """Proton names as a view into the library name array"""
+        offsets = self._library.offsets
+        return self._library.names[offsets[self._index]:offsets[self._index + 1]]
+
+    @property
+    def cshifts(self) -> np.ndarray:
+        """Chemical shifts in ppm as a view into the library shift array"""
+        offsets = self._library.offsets
+        return self._library.shifts[offsets[self._index]:offsets[self._index + 1]]
+
+    @property
+    def cmat(self) -> np.ndarray:
+        """Coupling matrix as an (N, N) view into the library coupling array"""
+        start, end = self._library.coupling_offsets[self._index:self._index + 2]
+        N = self.N
+        return self._library.couplings[start:end].reshape(N, N)
+
+    @property
+    def center(self) -> ppm:
+        """Center value for measurement"""
+        return float(self._library.centers[self._index])
+
+    @property
+    def line_widths(self) -> np.ndarray:
+        """Line widths of the source the system was loaded from, as a view into the library line width array"""
+        lw_offsets = self._library.lw_offsets
+        source = self._library.sources[self._index]
+        return self._library.line_widths[lw_offsets[source]:lw_offsets[source + 1]]
+
+    def __len__(self) -> int:
+        return self.N
+
+    def __repr__(self) -> str:
+        return f"SystemView(index={self._index}, N={self.N}, center={self.center})"
+
+class SystemLibrary(object):
+    __slots__ = LIBRARY_FIELDS + ('_shm',)
+
+    def __init__(self, offsets : np.ndarray, coupling_offsets : np.ndarray, names : np.ndarray,
+                 shifts : np.ndarray, couplings : np.ndarray, centers : np.ndarray,
+                 sources : np.ndarray, lw_offsets : np.ndarray, line_widths : np.ndarray, shm : shared_memory.SharedMemory | None = None) -> None:
+        """Compact collection of spin systems stored in contiguous arrays
+
+        Parameters
+        ----------
+        offsets : np.ndarray
+            int64 array of length (n_systems + 1), spins of system i are offsets[i]:offsets[i+1]
+        coupling_offsets : np.ndarray
+            int64 array of length (n_systems + 1), flattened coupling matrix bounds of each system
+        names : np.ndarray
+            unicode array of every proton name
+        shifts : np.ndarray
+            float64 array of every chemical shift in ppm
+        couplings : np.ndarray
+            float64 array of every flattened coupling matrix
+        centers : np.ndarray
+            float64 array of center values in ppm, one per system
+        sources : np.ndarray
+            int64 array of source indices, one per system
+        lw_offsets : np.ndarray
+            int64 array of length (n_sources + 1), line widths of source i are lw_offsets[i]:lw_offsets[i+1]
+        line_widths : np.ndarray
+            float64 array of every line width of every source
+        shm : SharedMemory | None, optional
+            Shared memory block backing the arrays, by default None
+        """
+        self.offsets = offsets
+        self.coupling_offsets = coupling_offsets
+        self.names = names
+        self.shifts = shifts
+        self.couplings = couplings
+        self.centers = centers
+        self.sources = sources
+        self.lw_offsets = lw_offsets
+        self.line_widths = line_widths
+        self._shm = shm
+
+        if len(offsets) != len(centers) + 1 or len(coupling_offsets) != len(offsets):
+            raise ValueError(
+                f"Offset arrays of length {len(offsets)} and {len(coupling_offsets)} do not match {len(centers)} systems"
+            )
+        if len(sources) != len(centers):
+            raise ValueError(f"Source array of length {len(sources)} does not match {len(centers)} systems")
+
+    @classmethod
+    def from_systems(cls, systems : Iterable[System], line_widths : list[Hz]) -> "SystemLibrary":
+        """Pack a collection of systems sharing the same line widths into a single library
+
+        Parameters
+        ----------
+        systems : Iterable[System]
+            systems previously obtained from an xml or text file
+        line_widths : list[Hz]
+            list of line widths for each spin matrix
+
+        Returns
+        -------
+        SystemLibrary
+            Library holding the systems in contiguous arrays
+        """
+        return cls.from_sources([(systems, line_widths)])
+
+    @classmethod
+    def from_sources(cls, sources : Iterable[tuple[Iterable[System], list[Hz]]]) -> "SystemLibrary":
+        """Pack systems from several sources, each with its own line widths, into a single library
+
+        Parameters
+        ----------
+        sources : Iterable[tuple[Iterable[System], list[Hz]]]
+            pairs of systems and line widths, as returned by loadSystems for each file
+
+        Returns
+        -------
+        SystemLibrary
+            Library holding the systems in contiguous arrays
+        """
+        names : list[str] = []
+        shifts : list[float] = []
+        couplings : list[np.ndarray] = []
+        centers : list[ppm] = []
+        sizes : list[int] = [0]
+        system_sources : list[int] = []
+        line_widths : list[Hz] = []
+        lw_sizes : list[int] = [0]
+
+        for source, (systems, source_line_widths) in enumerate(sources):
+            for syst in systems:
+                N = len(syst.cshifts)
+                if np.shape(syst.cmat) != (N, N):
+                    raise ValueError(
+                        f"Coupling matrix of shape {np.shape(syst.cmat)} does not match expected shape of ({N}, {N})"
+                    )
+                names.extend(syst.names)
+                shifts.extend(syst.cshifts)
+                couplings.append(np.asarray(syst.cmat, dtype=float).ravel())
+                centers.append(syst.center)
+                sizes.append(N)
+                system_sources.append(source)
+            line_widths.extend(source_line_widths)
+            lw_sizes.append(len(source_line_widths))
+
+        sizes_arr = np.array(sizes, dtype=np.int64)
+
+        return cls(
+            np.cumsum(sizes_arr),
+            np.cumsum(sizes_arr * sizes_arr),
+            np.array(names, dtype=str) if names else np.empty(0, dtype='<U1'),
+            np.array(shifts, dtype=float),
+            np.concatenate(couplings) if couplings else np.empty(0, dtype=float),
+            np.array(centers, dtype=float),
+            np.array(system_sources, dtype=np.int64),
+            np.cumsum(np.array(lw_sizes, dtype=np.int64)),
+            np.array(line_widths, dtype=float),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes held by the library arrays"""
+        return sum(getattr(self, field).nbytes for field in LIBRARY_FIELDS)
+
+    @property
+    def shared(self) -> bool:
+        """Whether the library arrays live in a shared memory block"""
+        return self._shm is not None
+
+    def layout(self) -> Layout:
+        """Describe the position of each array when packed into a single buffer
+
+        Returns
+        -------
+        Layout
+            Mapping of field name to (dtype string, shape, byte offset)
+        """
+        layout : Layout = {}
+        position = 0
+        for field in LIBRARY_FIELDS:
+            array : np.ndarray = getattr(self, field)
+            layout[field] = (array.dtype.str, array.shape, position)
+            position += _align(array.nbytes)
+        return layout
+
+    def share(self) -> "SystemLibrary":
+        """Copy the library into a new shared memory block
+
+        The returned library pickles as a reference to the block rather than its data,
+        so handing it to process pool workers does not copy the arrays.
+        The caller owns the block and should call unlink() once every process is done.
+
+        Returns
+        -------
+        SystemLibrary
+            Library backed by shared memory
+        """
+        layout = self.layout()
+        size = max(1, sum(_align(getattr(self, field).nbytes) for field in LIBRARY_FIELDS))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        arrays = _map_layout(shm, layout)
+        for field in LIBRARY_FIELDS:
+            arrays[field][...] = getattr(self, field)
+
+        return SystemLibrary(*(arrays[field] for field in LIBRARY_FIELDS), shm=shm)
+
+    @classmethod
+    def attach(cls, name : str, layout : Layout) -> "SystemLibrary":
+        """Attach to a library previously placed in shared memory by share()
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory block
+        layout : Layout
+            Array layout of the block, as returned by layout()
+
+        Returns
+        -------
+        SystemLibrary
+            Library whose arrays are views into the shared memory block
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+        arrays = _map_layout(shm, layout)
+
+        return cls(*(arrays[field] for field in LIBRARY_FIELDS), shm=shm)
+
+    def close(self) -> None:
+        """Release this process' mapping of the shared memory block, if any
+
+        Raises
+        ------
+        BufferError
+            If views previously taken from the library are still alive,
+            the library is left attached and usable
+        """
+        if self._shm is None:
+            return
+
+        # Drop the library's own exports of the block, any remaining export belongs to a live view
+        layout = self.layout()
+        for field in LIBRARY_FIELDS:
+            delattr(self, field)
+        try:
+            self._shm.close()
+        except BufferError:
+            # SharedMemory.close() drops its memoryview before the mmap refuses to close,
+            # restore it from the still open mmap so the block can be mapped again
+            self._shm._buf = memoryview(self._shm._mmap)
+            arrays = _map_layout(self._shm, layout)
+            for field in LIBRARY_FIELDS:
+                setattr(self, field, arrays[field])
+            raise
+
+        for field, (dtype, shape, _) in layout.items():
+            setattr(self, field, np.empty((0,) * len(shape), dtype=np.dtype(dtype)))
+        self._shm = None
+
+    def unlink(self) -> None:
+        """Close and destroy the shared memory block backing the library, if any
+
+        Raises
+        ------
+        BufferError
+            If views previously taken from the library are still alive, the block is kept
+        """
+        shm = self._shm
+        self.close()
+        if shm is not None:
+            shm.unlink()
+
+    def __reduce__(self):
+        if self._shm is not None:
+            return (SystemLibrary.attach, (self._shm.name, self.layout()))
+        return (SystemLibrary, tuple(getattr(self, field) for field in LIBRARY_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.centers)
+
+    def __getitem__(self, index : int) -> SystemView:
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"System index {index} out of range for library of {count} systems")
+        return SystemView(self, index)
+
+    def __iter__(self) -> Iterator[SystemView]:
+        for i in range(len(self)):
+            yield SystemView(self, i)
+
+    def __repr__(self) -> str:
+        return f"SystemLibrary(systems={len(self)}, spins={len(self.shifts)}, nbytes={self.nbytes}, shared={self.shared})"
+
+def _map_layout(shm : shared_memory.SharedMemory, layout : Layout) -> dict[str, np.ndarray]:
+    """Create numpy views for every array described by the layout within a shared memory block"""
+    return {
+        field : np.frombuffer(shm.buf, dtype=np.dtype(dtype), count=prod(shape), offset=offset).reshape(shape)
+        for field, (dtype, shape, offset) in layout.items()
+    }
@@ -0,0 +1,152 @@
+from nmrsim.math import normalize_peaklist
+import numpy as np
+
+# Intensity cutoff matching nmrsim's second-order simulation
+INTENSITY_CUTOFF = 0.001
+# Transitions closer than this (in Hz) are treated as one line before applying the cutoff
+FREQUENCY_TOLERANCE = 1e-6
+
+def spin_blocks(nspins : int) -> tuple[list[np.ndarray], np.ndarray]:
+    """Group the 2^n product states by number of beta spins
+
+    Spin k is stored in bit (nspins - 1 - k) of the state index, matching the kronecker
+    ordering of nmrsim, where a set bit is a beta spin.
+
+    Parameters
+    ----------
+    nspins : int
+        Number of spins in the system
+
+    Returns
+    -------
+    tuple[list[np.ndarray], np.ndarray]
+        - list of state arrays, entry k holds every state with k beta spins
+        - position of each state within its block
+    """
+    states = np.arange(2**nspins, dtype=np.int64)
+    beta_count = np.zeros(2**nspins, dtype=np.int64)
+    for k in range(nspins):
+        beta_count += (states >> k) & 1
+
+    blocks = [states[beta_count == k] for k in range(nspins + 1)]
+    position = np.empty(2**nspins, dtype=np.int64)
+    for block in blocks:
+        position[block] = np.arange(len(block))
+
+    return blocks, position
+
+def hamiltonian_block(v : np.ndarray, J : np.ndarray, block : np.ndarray, position : np.ndarray) -> np.ndarray:
+    """Build the spin Hamiltonian restricted to one block of equal total spin
+
+    The Hamiltonian conserves the number of beta spins, so each block can be solved on its own.
+    Diagonal terms come from the Zeeman and Jz terms, off-diagonal terms from flip-flops of
+    antiparallel spin pairs.
+
+    Parameters
+    ----------
+    v : np.ndarray
+        Frequency of each nucleus in Hz
+    J : np.ndarray
+        Symmetric coupling matrix in Hz
+    block : np.ndarray
+        States of the block
+    position : np.ndarray
+        Position of each state within its block
+
+    Returns
+    -------
+    np.ndarray
+        Dense Hamiltonian of shape (len(block), len(block))
+    """
+    nspins = len(v)
+    size = len(block)
+
+    # Spin z projection of every spin in every state, alpha = +1/2, beta = -1/2
+    bits = np.array([(block >> (nspins - 1 - k)) & 1 for k in range(nspins)])
+    mz = 0.5 - bits
+
+    diagonal = np.arange(size)
+    H = np.zeros((size, size))
+    H[diagonal, diagonal] = v @ mz
+
+    for a in range(nspins):
+        for b in range(a + 1, nspins):
+            if J[a, b] == 0:
+                continue
+            H[diagonal, diagonal] += J[a, b] * mz[a] * mz[b]
+
+            # Flip-flop between states where spins a and b are antiparallel
+            flip = bits[a] != bits[b]
+            mask = (1 << (nspins - 1 - a)) | (1 << (nspins - 1 - b))
+            H[position[block[flip]], position[block[flip] ^ mask]] += 0.5 * J[a, b]
+
+    return H
+
+def secondorder_blocks(freqs : list[float] | np.ndarray, couplings : np.ndarray,
+                       normalize : bool = True, cutoff : float = INTENSITY_CUTOFF) -> list[tuple[float, float]]:
+    """Calculate second-order (frequency, intensity) signals without dense 2^n operators
+
+    Each block of equal total spin is diagonalised separately and intensities are only computed
+    between neighbouring blocks, through the single spin flips that connect them.
+    Memory grows with the number of allowed transitions rather than 4^n.
+
+    Transitions with coincident frequencies, from any pair of blocks, are summed before the cutoff
+    is applied, so that degenerate levels (e.g. methyl groups) do not depend on the arbitrary
+    eigenvector basis within a degenerate subspace. Such lines are reported once with their total
+    intensity, so peaklists of degenerate or uncoupled spins differ from nmrsim line for line
+    while giving the same lineshape.
+
+    Parameters
+    ----------
+    freqs : list[float] | np.ndarray
+        Frequency of each nucleus in Hz
+    couplings : np.ndarray
+        Symmetric (n, n) coupling matrix in Hz
+    normalize : bool, optional
+        Scale intensities so that they add up to the number of nuclei, by default True
+    cutoff : float, optional
+        Intensity cutoff for reporting signals, by default INTENSITY_CUTOFF
+
+    Returns
+    -------
+    list[tuple[float, float]]
+        List of (frequency, intensity) signals
+    """
+    v = np.asarray(freqs, dtype=float)
+    J = np.asarray(couplings, dtype=float)
+    nspins = len(v)
+
+    blocks, position = spin_blocks(nspins)
+    eigen = [np.linalg.eigh(hamiltonian_block(v, J, block, position)) for block in blocks]
+
+    frequencies : list[np.ndarray] = []
+    intensities : list[np.ndarray] = []
+    for k in range(nspins):
+        E_lower, V_lower = eigen[k]
+        E_upper, V_upper = eigen[k + 1]
+
+        # Apply the transition operator as a list of allowed single spin flips
+        TV = np.zeros((len(blocks[k]), V_upper.shape[1]))
+        for spin in range(nspins):
+            mask = 1 << (nspins - 1 - spin)
+            source = blocks[k][(blocks[k] & mask) == 0]
+            TV[position[source]] += V_upper[position[source | mask]]
+
+        frequencies.append(np.abs(E_lower[:, np.newaxis] - E_upper).ravel())
+        intensities.append(np.square(V_lower.T @ TV).ravel())
+
+    # Merge coincident transitions from every block pair, then apply the cutoff to each merged line
+    F = np.concatenate(frequencies)
+    I = np.concatenate(intensities)
+    order = np.argsort(F, kind='stable')
+    F, I = F[order], I[order]
+    line = np.concatenate(([0], np.cumsum(np.diff(F) > FREQUENCY_TOLERANCE)))
+    F = np.bincount(line, F) / np.bincount(line)
+    I = np.bincount(line, I)
+
+    keep = I >= cutoff
+    peaklist = list(zip(F[keep].tolist(), I[keep].tolist()))
+    if normalize:
+        peaklist = normalize_peaklist(peaklist, nspins)
+
+    return peaklist
@@ -1,4 +1,5 @@
 from nmrsim import SpinSystem
+from .qm import secondorder_blocks
 import numpy as np
 from typing import Literal, cast
 import sys 
@@ -9,6 +10,8 @@ type ppm = float
 
 def ppm_to_hz(ppm, spec_freq):
     """Given a chemical shift in ppm and spectrometer frequency in MHz, return the corresponding chemical shift in Hz."""
+    if isinstance(ppm, np.ndarray):
+        return ppm * spec_freq
     return [d * spec_freq for d in ppm]
 
 def frequency_to_time(array : np.ndarray) -> np.ndarray:
@@ -78,6 +81,25 @@ class SSystem(SpinSystem):
 
         super().__init__(self.chem_shifts, cMatrix)
 
+    def peaklist(self) -> list[tuple[float, float]]:
+        """Return a list of (frequency, intensity) signals
+
+        Second-order systems are solved per block of equal total spin instead of
+        through nmrsim's dense 2^N operators, first-order systems are left to nmrsim.
+        For non-degenerate systems the peaklist matches nmrsim. Systems with equal shifts
+        (e.g. methyl groups) or uncoupled spins intentionally differ from nmrsim line for line:
+        coincident transitions are merged into one line before the intensity cutoff, which
+        makes the result independent of the eigenvector basis, see secondorder_blocks.
+
+        Returns
+        -------
+        list[tuple[float, float]]
+            List of (frequency, intensity) signals
+        """
+        if self._second_order:
+            return secondorder_blocks(self._v, self._J)
+        return super().peaklist()
+
 class System(object):
     def __init__(self, names : list[str], cshifts : list[Hz], cmat : np.ndarray, center : ppm) -> None:
         """system object with attributes describing spin matrix system
@@ -1 +1,2 @@
-from .read import *
\ No newline at end of file
+from .read import *
+from .write import *
\ No newline at end of file
@@ -53,7 +53,7 @@ def generateSystems(xmlfile : str,
 
     for syst in systems:
         spin_systems.append(
-            SSystem(syst.names, syst.cshifts, line_widths, syst.cmat.astype(float), field_strength, points, spec_width, obs_freq, syst.center)
+            SSystem(syst.names, syst.cshifts, line_widths, syst.cmat.astype(float, copy=False), field_strength, points, spec_width, obs_freq, syst.center)
         )
         
     return spin_systems
@@ -125,6 +125,27 @@ def loadSystems(xmlfile : str, system_count : int = 0) -> tuple[list[System], li
 
     return systems, line_widths
 
+def loadLibrary(xmlfiles : str | list[str], system_count : int = 0) -> SystemLibrary:
+    """Obtain a compact system library from one or more coupling matrix xml files
+
+    Parameters
+    ----------
+    xmlfiles : str | list[str]
+        File path or list of file paths for the xml files
+    system_count : int
+        Number of submatrices in each system (0 | 1 if only one)
+
+    Returns
+    -------
+    SystemLibrary
+        Library holding every system in contiguous arrays,
+        each system keeps the line widths of the xml file it was loaded from
+    """
+    if isinstance(xmlfiles, str):
+        xmlfiles = [xmlfiles]
+
+    return SystemLibrary.from_sources(loadSystems(xmlfile, system_count) for xmlfile in xmlfiles)
+
 def loadSystemFromFile(file : str) -> System:
     """
     Parse a text file and return a System object.
@@ -0,0 +1,48 @@
+from typing import Iterable
+import numpy as np
+
+def writePeaks(chunks : Iterable[tuple[np.ndarray, np.ndarray]], output : str, format : str,
+               points : int, dtype : type = np.float64) -> None:
+    """Write x,y peak chunks to a file as they are produced
+
+    Only one chunk is held in memory at a time, the full (N,2) peaks array is never built.
+    Output matches np.save or np.savetxt applied to the stacked array.
+
+    Parameters
+    ----------
+    chunks : Iterable[tuple[np.ndarray, np.ndarray]]
+        Consecutive frequency (x) and intensity (y) arrays
+    output : str
+        Output file path including extension
+    format : str
+        Output file format (npy, csv or txt)
+    points : int
+        Total number of rows across every chunk
+    dtype : type, optional
+        Floating point type of the written data, by default np.float64
+
+    Raises
+    ------
+    ValueError
+        If the number of rows written does not match points
+    """
+    written = 0
+    match format:
+        case 'npy':
+            with open(output, 'wb') as f:
+                header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                          'fortran_order': False,
+                          'shape': (points, 2)}
+                np.lib.format.write_array_header_1_0(f, header)
+                for x, y in chunks:
+                    f.write(np.column_stack((x, y)).astype(dtype, copy=False).tobytes())
+                    written += len(x)
+        case _:
+            delimiter = ',' if format == 'csv' else ' '
+            with open(output, 'wb') as f:
+                for x, y in chunks:
+                    np.savetxt(f, np.column_stack((x, y)).astype(dtype, copy=False), delimiter=delimiter)
+                    written += len(x)
+
+    if written != points:
+        raise ValueError(f"Wrote {written} rows to {output} but expected {points}")
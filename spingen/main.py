@@ -2,7 +2,8 @@ import sys
 from spingen.parser import *
 import numpy as np
 from pathlib import Path
-from spingen.modules import nmrConvert, get_peaksXML, get_peaks_from_file
+from spingen.iostream import writePeaks
+from spingen.modules import nmrConvert, get_peaklistXML, get_peaklist_from_file, iter_peaks
 
 def main():
     """Main entry-point
@@ -20,16 +21,17 @@ def main():
     domain = argv.domain
     convert = argv.convert
     w = argv.w
+    dtype = np.float32 if argv.float32 else np.float64
 
     # Somewhere specify solvent
     system_count = argv.sub_count
 
     if input.lower().endswith('.xml'):
-        peaks = get_peaksXML(input, system_count, field_strength, points, spec_width, obs_freq, w)
+        peaklist = get_peaklistXML(input, system_count, field_strength, points, spec_width, obs_freq)
     else:
         if lws is None:
             lws = [1.0]
-        peaks = get_peaks_from_file(input, lws, field_strength, points, spec_width, obs_freq, w)
+        peaklist = get_peaklist_from_file(input, lws, field_strength, points, spec_width, obs_freq)
     
     # if domain in ['t', 'time']:
     #     peaks = frequency_to_time(peaks)
@@ -37,13 +39,8 @@ def main():
     #     output = output_file
     # else:
     #     output = output_file + "_{:02}".format(i+1)
-    match format:
-        case 'npy':
-            np.save(output, peaks)
-        case 'csv':
-            np.savetxt(f"{output}.{format}", peaks, delimiter=',')
-        case _:
-            np.savetxt(f"{output}.{format}", peaks)
+    # Spectrum is rendered and written one grid chunk at a time
+    writePeaks(iter_peaks(peaklist, w, points, dtype=dtype), f"{output}.{format}", format, points, dtype)
     
     if not convert:
         return
@@ -51,13 +48,7 @@ def main():
     nmr_peaks = nmrConvert(convert)
 
     nmr_output = Path(convert).stem
-    match format:
-        case 'npy':
-            np.save(nmr_output, nmr_peaks)
-        case 'csv':
-            np.savetxt(f"{nmr_output}.{format}", nmr_peaks, delimiter=',')
-        case _:
-            np.savetxt(f"{nmr_output}.{format}", nmr_peaks)
+    writePeaks([(nmr_peaks[:, 0], nmr_peaks[:, 1])], f"{nmr_output}.{format}", format, len(nmr_peaks), nmr_peaks.dtype.type)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
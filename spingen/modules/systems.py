@@ -1,12 +1,15 @@
-from ..data import SSystem, System, Hz
+from ..data import SSystem, System, SystemLibrary, Hz
 from ..iostream import generateSystems, loadSystemFromFile
-from nmrsim.plt import mplplot
+from nmrsim.math import lorentz
+from typing import Iterator
 import numpy as np
 from sys import stderr
 
-def get_peaksXML(input : str, system_count : int = 0, field_strength : Hz = 500.0, 
-                 points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0, w : int = 1) -> np.ndarray:
-    """Obtain an x,y peaks array from an xml file with given parameters
+CHUNK_SIZE = 65536
+
+def get_peaklistXML(input : str, system_count : int = 0, field_strength : Hz = 500.0,
+                    points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0) -> list[tuple[float, float]]:
+    """Obtain the combined (frequency, intensity) peaklist of an xml file with given parameters
 
     Parameters
     ----------
@@ -22,37 +25,235 @@ def get_peaksXML(input : str, system_count : int = 0, field_strength : Hz = 500.
         Spectral width of system, by default 50
     obs_freq : float, optional
         Observation frequency of measurement device, by default 50
-    w : int
-        Peak width at half height
+
     Returns
     -------
-    ndarray
-        2D array of peaks of shape (len(x),2)
+    list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
     """
     systems : list[SSystem] = []
     systems = generateSystems(input, system_count, field_strength, points, spec_width, obs_freq)
 
+    return combine_peaklists(systems)
+
+def get_peaklist(systems : list[System] | SystemLibrary, line_widths : list[Hz] | None = None,
+                 system_count : int = 0, field_strength : float = 500, points : int = 1000, spec_width : float = 50,
+                 obs_freq : float = 50) -> list[tuple[float, float]]:
+    """Obtain the combined (frequency, intensity) peaklist of a system set with given parameters
+
+    Parameters
+    ----------
+    systems : list[system] | SystemLibrary
+        list of systems or system library previously obtained from an xml file
+    line_widths : list[Hz] | None, optional
+        list of line widths for each spin matrix, by default None
+        uses the line widths of each library system
+    system_count : int, optional
+        Number of submatrices in the system, by default 0
+    field_strength : float, optional
+        Field strength of measurement device, by default 500
+    points : int, optional
+        Number of points to sample, does not affect peaks but increases resolution, by default 1000
+    spec_width : float, optional
+        Spectral width of system, by default 50
+    obs_freq : float, optional
+        Observation frequency of measurement device, by default 50
+
+    Returns
+    -------
+    list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
+
+    Raises
+    ------
+    ValueError
+        If no line widths are given for a list of systems that is not a SystemLibrary
+    """
+    if line_widths is None and not isinstance(systems, SystemLibrary):
+        raise ValueError("Line widths are required unless systems is a SystemLibrary")
+
+    ssystems = []
+    for syst in systems:
+        lws = syst.line_widths if line_widths is None else line_widths
+        ssystems.append(SSystem(syst.names, syst.cshifts, lws, syst.cmat.astype(float, copy=False), field_strength, points, spec_width, obs_freq, syst.center))
+
+    return combine_peaklists(ssystems)
+
+def get_peaklist_from_file(input : str, lws : list[float], field_strength : Hz = 500.0,
+                           points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0) -> list[tuple[float, float]]:
+    """Obtain the (frequency, intensity) peaklist of a non-xml file with given parameters
+
+    Parameters
+    ----------
+    input : str
+        input file path as a string
+    lws : list[float]
+        Line-widths of the molecules (1 or all)
+    field_strength : Hz, optional
+        Field strength of measurement device, by default 500
+    points : int, optional
+        Number of points to sample, does not affect peaks but increases resolution, by default 1000
+    spec_width : float, optional
+        Spectral width of system, by default 50
+    obs_freq : float, optional
+        Observation frequency of measurement device, by default 50
+
+    Returns
+    -------
+    list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
+    """
+    syst : System = loadSystemFromFile(input)
+
+    ssystem = SSystem(syst.names, syst.cshifts, lws, syst.cmat.astype(float, copy=False),
+                      field_strength, points, spec_width, obs_freq, syst.center)
+
+    return combine_peaklists([ssystem])
+
+def combine_peaklists(systems : list[SSystem]) -> list[tuple[float, float]]:
+    """Add spin systems together and return the sorted peaklist of the result
+
+    Parameters
+    ----------
+    systems : list[SSystem]
+        Spin systems to combine
+
+    Returns
+    -------
+    list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
+    """
     output_system = systems[0]
 
     for i in range(1, len(systems)):
         output_system += systems[i]
-    
-    x,y = mplplot(output_system.peaklist(), w=w, hidden=True)
-    peaks = np.array([x,y]).T
+
+    return sorted(output_system.peaklist())
+
+def iter_peaks(peaklist : list[tuple[float, float]], w : float = 1, points : int = 1000,
+               chunk_size : int = CHUNK_SIZE, dtype : type = np.float64) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Render the lineshape of a peaklist one grid chunk at a time
+
+    The frequency grid matches np.linspace over the peaklist limits padded by 50 Hz,
+    but only chunk_size points of the grid are held in memory at once.
+    Each chunk is always computed in float64 and only cast to dtype when yielded,
+    as absolute frequencies in float32 cannot resolve fine grids.
+
+    Parameters
+    ----------
+    peaklist : list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
+    w : float, optional
+        Peak width at half height, by default 1
+    points : int, optional
+        Number of points to sample, by default 1000
+    chunk_size : int, optional
+        Number of points rendered per chunk, by default CHUNK_SIZE
+    dtype : type, optional
+        Floating point type of the yielded arrays, np.float32 or np.float64, by default np.float64
+
+    Yields
+    ------
+    tuple[np.ndarray, np.ndarray]
+        Frequency (x) and intensity (y) arrays for consecutive slices of the grid
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, received {chunk_size}")
+
+    l_limit = peaklist[0][0] - 50
+    r_limit = peaklist[-1][0] + 50
+    step = (r_limit - l_limit) / (points - 1) if points > 1 else 0.0
+
+    for start in range(0, points, chunk_size):
+        stop = min(start + chunk_size, points)
+
+        # Same arithmetic as np.linspace so the full grid is reproduced exactly
+        x = np.arange(start, stop, dtype=np.float64)
+        x *= step
+        x += l_limit
+        if stop == points and points > 1:
+            x[-1] = r_limit
+
+        y = np.zeros_like(x)
+        for v, i in peaklist:
+            y += lorentz(x, v, i, w)
+
+        yield x.astype(dtype, copy=False), y.astype(dtype, copy=False)
+
+def render_peaks(peaklist : list[tuple[float, float]], w : float = 1, points : int = 1000,
+                 dtype : type = np.float64) -> np.ndarray:
+    """Render the lineshape of a peaklist into a single x,y peaks array
+
+    Parameters
+    ----------
+    peaklist : list[tuple[float, float]]
+        Sorted list of (frequency, intensity) signals
+    w : float, optional
+        Peak width at half height, by default 1
+    points : int, optional
+        Number of points to sample, by default 1000
+    dtype : type, optional
+        Floating point type of the output array, computation is always float64, by default np.float64
+
+    Returns
+    -------
+    ndarray
+        2D array of peaks of shape (points,2)
+    """
+    peaks = np.empty((points, 2), dtype=dtype)
+
+    start = 0
+    for x, y in iter_peaks(peaklist, w, points, dtype=dtype):
+        peaks[start:start + len(x), 0] = x
+        peaks[start:start + len(x), 1] = y
+        start += len(x)
 
     return peaks
 
-def get_peaks(systems : list[System], line_widths : list[Hz], system_count : int = 0,
+def get_peaksXML(input : str, system_count : int = 0, field_strength : Hz = 500.0, 
+                 points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0, w : int = 1,
+                 dtype : type = np.float64) -> np.ndarray:
+    """Obtain an x,y peaks array from an xml file with given parameters
+
+    Parameters
+    ----------
+    input : str
+        input xml file path as a string
+    system_count : int, optional
+        Number of submatrices in the system, by default 0
+    field_strength : Hz, optional
+        Field strength of measurement device, by default 500
+    points : int, optional
+        Number of points to sample, does not affect peaks but increases resolution, by default 1000
+    spec_width : float, optional
+        Spectral width of system, by default 50
+    obs_freq : float, optional
+        Observation frequency of measurement device, by default 50
+    w : int
+        Peak width at half height
+    dtype : type, optional
+        Floating point type of the output array, computation is always float64, by default np.float64
+    Returns
+    -------
+    ndarray
+        2D array of peaks of shape (len(x),2)
+    """
+    peaklist = get_peaklistXML(input, system_count, field_strength, points, spec_width, obs_freq)
+
+    return render_peaks(peaklist, w, points, dtype)
+
+def get_peaks(systems : list[System] | SystemLibrary, line_widths : list[Hz] | None = None, system_count : int = 0,
               field_strength : float = 500, points : int = 1000, spec_width : float = 50,
-              obs_freq : float = 50, w : int = 1) -> np.ndarray:
+              obs_freq : float = 50, w : int = 1, dtype : type = np.float64) -> np.ndarray:
     """Obtain an x,y peaks array from a system set with given parameters
 
     Parameters
     ----------
-    systems : list[system]
-        list of systems previously obtained from an xml file
-    line_widths : list[Hz]
-        list of line widths for each spin matrix
+    systems : list[system] | SystemLibrary
+        list of systems or system library previously obtained from an xml file
+    line_widths : list[Hz] | None, optional
+        list of line widths for each spin matrix, by default None
+        uses the line widths of each library system
     system_count : int, optional
         Number of submatrices in the system, by default 0
     field_strength : float, optional
@@ -65,28 +266,26 @@ def get_peaks(systems : list[System], line_widths : list[Hz], system_count : int
         Observation frequency of measurement device, by default 50
     w : int
         Peak width at half height
+    dtype : type, optional
+        Floating point type of the output array, computation is always float64, by default np.float64
         
     Returns
     -------
     ndarray
         2D array of peaks of shape (len(x),2)
-    """
-    ssystems = []
-    for syst in systems:
-        ssystems.append(SSystem(syst.names, syst.cshifts, line_widths, syst.cmat.astype(float), field_strength, points, spec_width, obs_freq, syst.center))
-    
-    output_system = ssystems[0]
-
-    for i in range(1, len(ssystems)):
-        output_system += ssystems[i]
 
-    x,y = mplplot(output_system.peaklist(), w=w, hidden=True)
-    peaks = np.array([x,y]).T
+    Raises
+    ------
+    ValueError
+        If no line widths are given for a list of systems that is not a SystemLibrary
+    """
+    peaklist = get_peaklist(systems, line_widths, system_count, field_strength, points, spec_width, obs_freq)
 
-    return peaks
+    return render_peaks(peaklist, w, points, dtype)
 
 def get_peaks_from_file(input : str, lws : list[float] , field_strength : Hz = 500.0, 
-                 points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0, w : int = 1) -> np.ndarray:
+                 points : int = 1000, spec_width : float = 50.0, obs_freq : float = 50.0, w : int = 1,
+                 dtype : type = np.float64) -> np.ndarray:
     """Obtain an x,y peaks array from an non-xml with given parameters
 
     Parameters
@@ -107,20 +306,16 @@ def get_peaks_from_file(input : str, lws : list[float] , field_strength : Hz = 5
         Observation frequency of measurement device, by default 50
     w : int
         Peak width at half height
+    dtype : type, optional
+        Floating point type of the output array, computation is always float64, by default np.float64
     Returns
     -------
     ndarray
         2D array of peaks of shape (len(x),2)
     """
-    syst : System = loadSystemFromFile(input)
-    
-    ssystem = SSystem(syst.names, syst.cshifts, lws, syst.cmat.astype(float),
-                      field_strength, points, spec_width, obs_freq, syst.center)
-    
-    x,y = mplplot(ssystem.peaklist(), w=w, hidden=True)
-    peaks = np.array([x,y]).T
+    peaklist = get_peaklist_from_file(input, lws, field_strength, points, spec_width, obs_freq)
 
-    return peaks
+    return render_peaks(peaklist, w, points, dtype)
 
 def nmrConvert(convert) -> np.ndarray:
     """convert NMR data into an (x,y) array in PPM
@@ -28,4 +28,6 @@ def parse(argv : list[str]) -> Namespace:
     parser.add_argument('-convert', type=str, metavar='NMR File', dest='convert',
                         default='', help='NMRPipe format file to convert to ppm')
     parser.add_argument('-w', type=float, default=1, metavar='[1]', dest='w', help='Peak width at half height')
+    parser.add_argument('-f32', '--float32', action='store_true', dest='float32',
+                        help='Write spectrum in single precision')
     return parser.parse_args(argv)
\ No newline at end of file
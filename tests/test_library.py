@@ -0,0 +1,118 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from spingen.data import SystemLibrary
+from spingen.iostream import loadLibrary, loadSystems
+from spingen.modules import get_peaks
+
+def coupling_matrix_xml(shifts : list[float], couplings : dict[tuple[int, int], float], lw : float) -> str:
+    spins = ''.join(f'<spin index="{i + 1}" name="H{i + 1}"/>' for i in range(len(shifts)))
+    cs = ''.join(f'<cs index="{i + 1}" ppm="{ppm}"/>' for i, ppm in enumerate(shifts))
+    cpl = ''.join(f'<coupling from_index="{i}" to_index="{j}" value="{val}"/>' for (i, j), val in couplings.items())
+    return (f'<coupling_matrix><lw>{lw}</lw><spin_names>{spins}</spin_names>'
+            f'<chemical_shifts_ppm>{cs}</chemical_shifts_ppm><couplings_Hz>{cpl}</couplings_Hz>'
+            f'<DSS_region><min_ppm>0.5</min_ppm><max_ppm>{shifts[0] + 4}</max_ppm></DSS_region></coupling_matrix>')
+
+@pytest.fixture
+def xmlfiles(tmp_path):
+    # Primary matrix followed by two submatrices, loaded with system_count = 2
+    first = tmp_path / 'first.xml'
+    first.write_text('<root>' + coupling_matrix_xml([1.0, 2.0, 3.0], {(1, 2): 7.0}, 0.8)
+                     + coupling_matrix_xml([1.2, 1.9, 3.6], {(1, 2): 7.0, (2, 3): 2.5}, 0.8)
+                     + coupling_matrix_xml([5.1, 6.3], {(1, 2): 11.0}, 0.8) + '</root>')
+    second = tmp_path / 'second.xml'
+    second.write_text('<root>' + coupling_matrix_xml([4.0, 4.5], {(1, 2): 3.0}, 2.5)
+                      + coupling_matrix_xml([0.9, 2.2, 2.4, 7.1], {(1, 2): 6.0, (2, 3): 15.0, (3, 4): 1.5}, 2.5)
+                      + coupling_matrix_xml([3.3], {}, 2.5) + '</root>')
+    return [str(first), str(second)]
+
+@pytest.fixture
+def shared(xmlfiles):
+    library = loadLibrary(xmlfiles, 2).share()
+    yield library
+    library.unlink()
+
+def read_system(args : tuple[SystemLibrary, int]) -> tuple[list[str], list[float], list[list[float]], list[float], bool]:
+    library, i = args
+    syst = library[i]
+    return syst.names.tolist(), syst.cshifts.tolist(), syst.cmat.tolist(), syst.line_widths.tolist(), library.shared
+
+def test_from_sources_round_trip(xmlfiles):
+    sources = [loadSystems(xmlfile, 2) for xmlfile in xmlfiles]
+    library = SystemLibrary.from_sources(sources)
+
+    expected = [(syst, lws) for systems, lws in sources for syst in systems]
+    assert len(library) == len(expected) == 4
+    for view, (syst, lws) in zip(library, expected):
+        assert view.names.tolist() == syst.names
+        np.testing.assert_array_equal(view.cshifts, syst.cshifts)
+        np.testing.assert_array_equal(view.cmat, syst.cmat)
+        assert view.center == syst.center
+        np.testing.assert_array_equal(view.line_widths, lws)
+        assert np.shares_memory(view.cmat, library.couplings)
+
+    assert library[0].line_widths.tolist() != library[-1].line_widths.tolist()
+
+def test_pickle_plain_library_copies_arrays(xmlfiles):
+    library = loadLibrary(xmlfiles, 2)
+    restored = pickle.loads(pickle.dumps(library))
+
+    assert not restored.shared
+    np.testing.assert_array_equal(restored.couplings, library.couplings)
+    np.testing.assert_array_equal(restored[3].line_widths, library[3].line_widths)
+
+def test_pickle_shared_library_sends_reference(shared):
+    attach, args = shared.__reduce__()
+    assert attach == SystemLibrary.attach
+    assert args == (shared._shm.name, shared.layout())
+
+    restored = pickle.loads(pickle.dumps(shared))
+    try:
+        assert restored.shared
+        np.testing.assert_array_equal(restored[1].cmat, shared[1].cmat)
+    finally:
+        restored.close()
+
+def test_process_pool_reads_shared_library(shared):
+    with ProcessPoolExecutor(2) as pool:
+        results = list(pool.map(read_system, [(shared, i) for i in range(len(shared))]))
+
+    for i, (names, cshifts, cmat, line_widths, is_shared) in enumerate(results):
+        assert is_shared
+        assert names == shared[i].names.tolist()
+        assert cshifts == shared[i].cshifts.tolist()
+        assert cmat == shared[i].cmat.tolist()
+        assert line_widths == shared[i].line_widths.tolist()
+
+def test_close_with_live_view_raises(xmlfiles):
+    library = loadLibrary(xmlfiles, 2).share()
+    cmat = library[1].cmat
+    expected = cmat.copy()
+
+    with pytest.raises(BufferError):
+        library.unlink()
+
+    # Both the view and the library remain usable
+    np.testing.assert_array_equal(cmat, expected)
+    np.testing.assert_array_equal(library[1].cmat, expected)
+    assert library.shared
+
+    del cmat
+    library.unlink()
+    assert not library.shared
+    assert len(library) == 0
+
+def test_get_peaks_library_matches_systems(xmlfiles):
+    for xmlfile in xmlfiles:
+        systems, line_widths = loadSystems(xmlfile, 2)
+        expected = get_peaks(systems, line_widths, 2)
+        result = get_peaks(loadLibrary(xmlfile, 2), None, 2)
+        np.testing.assert_array_equal(result, expected)
+
+def test_get_peaks_requires_line_widths_for_systems(xmlfiles):
+    systems, _ = loadSystems(xmlfiles[0], 2)
+    with pytest.raises(ValueError):
+        get_peaks(systems)
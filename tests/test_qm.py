@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from nmrsim.math import reduce_peaks
+from nmrsim.plt import add_lorentzians
+from nmrsim.qm import qm_spinsystem
+
+from spingen.data import secondorder_blocks, FREQUENCY_TOLERANCE
+
+def random_system(nspins : int, rng : np.random.Generator, density : float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+    v = rng.uniform(500, 4000, nspins)
+    J = np.triu(rng.uniform(-15, 15, (nspins, nspins)) * (rng.random((nspins, nspins)) < density), 1)
+    return v, J + J.T
+
+def ethyl() -> tuple[np.ndarray, np.ndarray]:
+    v = np.array([1.2, 1.2, 1.2, 3.6, 3.6]) * 500
+    J = np.zeros((5, 5))
+    J[:3, 3:] = 7.0
+    return v, J + J.T
+
+def a3x() -> tuple[np.ndarray, np.ndarray]:
+    v = np.array([10.0, 10.0, 10.0, 30.0])
+    J = np.zeros((4, 4))
+    J[:3, 3] = 7.0
+    return v, J + J.T
+
+@pytest.mark.parametrize('nspins', range(1, 9))
+def test_matches_nmrsim_non_degenerate(nspins):
+    rng = np.random.default_rng(nspins)
+    for _ in range(3):
+        v, J = random_system(nspins, rng)
+        expected = np.array(sorted(qm_spinsystem(v, J)))
+        result = np.array(sorted(secondorder_blocks(v, J)))
+        assert result.shape == expected.shape
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize('nspins', range(2, 9))
+def test_matches_nmrsim_sparse_couplings(nspins):
+    # Uncoupled spins give exactly coincident lines, which are reported once
+    rng = np.random.default_rng(100 + nspins)
+    v, J = random_system(nspins, rng, density=0.5)
+    expected = np.array(reduce_peaks(qm_spinsystem(v, J), FREQUENCY_TOLERANCE))
+    result = np.array(sorted(secondorder_blocks(v, J)))
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, rtol=0, atol=FREQUENCY_TOLERANCE)
+
+@pytest.mark.parametrize('system', [ethyl, a3x])
+def test_degenerate_shifts(system):
+    v, J = system()
+    result = np.array(sorted(secondorder_blocks(v, J)))
+
+    # Independent of the eigenvector basis, so continuous with a slightly split system
+    split = np.array(sorted(secondorder_blocks(v + 1e-9 * np.arange(len(v)), J)))
+    assert split.shape == result.shape
+    np.testing.assert_allclose(split, result, rtol=0, atol=1e-7)
+
+    assert result[:, 1].sum() == pytest.approx(len(v))
+
+    # nmrsim drops basis-dependent fragments below its cutoff, so only the lineshape is close
+    x = np.linspace(v.min() - 60, v.max() + 60, 10000)
+    expected_y = add_lorentzians(x, sorted(qm_spinsystem(v, J)), 1)
+    result_y = add_lorentzians(x, result.tolist(), 1)
+    np.testing.assert_allclose(result_y, expected_y, rtol=0, atol=1e-4 * expected_y.max())
@@ -0,0 +1,56 @@
+import filecmp
+
+import numpy as np
+import pytest
+
+from spingen.iostream import writePeaks
+from spingen.modules import iter_peaks, render_peaks
+
+PEAKLIST = [(3990.0, 1.0), (4003.5, 0.25), (4010.0, 1.0)]
+
+def save_reference(peaks : np.ndarray, path : str, format : str) -> None:
+    match format:
+        case 'npy':
+            np.save(path, peaks)
+        case 'csv':
+            np.savetxt(path, peaks, delimiter=',')
+        case _:
+            np.savetxt(path, peaks)
+
+@pytest.mark.parametrize('format', ['npy', 'csv', 'txt'])
+@pytest.mark.parametrize('points, chunk_size', [(1000, 77), (1000, 1000), (1000, 4096), (1, 16)])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_write_matches_numpy(tmp_path, format, points, chunk_size, dtype):
+    output = str(tmp_path / f'streamed.{format}')
+    reference = str(tmp_path / f'reference.{format}')
+
+    writePeaks(iter_peaks(PEAKLIST, 1, points, chunk_size, dtype), output, format, points, dtype)
+    save_reference(render_peaks(PEAKLIST, 1, points, dtype), reference, format)
+
+    assert filecmp.cmp(output, reference, shallow=False)
+
+@pytest.mark.parametrize('format', ['npy', 'csv', 'txt'])
+def test_write_casts_float64_chunks(tmp_path, format):
+    output = str(tmp_path / f'streamed.{format}')
+    reference = str(tmp_path / f'reference.{format}')
+
+    writePeaks(iter_peaks(PEAKLIST, 1, 500, 77, np.float64), output, format, 500, np.float32)
+    save_reference(render_peaks(PEAKLIST, 1, 500, np.float32), reference, format)
+
+    assert filecmp.cmp(output, reference, shallow=False)
+
+def test_write_row_count_mismatch(tmp_path):
+    with pytest.raises(ValueError):
+        writePeaks(iter_peaks(PEAKLIST, 1, 100), str(tmp_path / 'short.npy'), 'npy', 101)
+
+@pytest.mark.parametrize('points, chunk_size', [(1000, 77), (1000, 1000), (1, 16), (2, 1), (100_000, 8192)])
+def test_grid_matches_linspace(points, chunk_size):
+    x = np.concatenate([x for x, _ in iter_peaks(PEAKLIST, 1, points, chunk_size)])
+    expected = np.linspace(PEAKLIST[0][0] - 50, PEAKLIST[-1][0] + 50, points)
+    np.testing.assert_array_equal(x, expected)
+
+def test_float32_is_cast_float64_render():
+    peaks64 = render_peaks(PEAKLIST, 1, 1_000_000, np.float64)
+    peaks32 = render_peaks(PEAKLIST, 1, 1_000_000, np.float32)
+    assert peaks32.dtype == np.float32
+    np.testing.assert_array_equal(peaks32, peaks64.astype(np.float32))